@@ -3,41 +3,183 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from datetime import datetime
+from reportlab.pdfgen import canvas
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+from itertools import repeat
+import csv
+import numpy as np
 import os
 import json
+import re
+import sys
+
+# Bound method so the format string is parsed once, not per totals row
+TOTAL_FMT = "₹{:.2f}".format
+
+@lru_cache(maxsize=256)
+def _static_paragraph(text, style):
+    """Paragraph cache for text that repeats across invoices.
+
+    Paragraph.__init__ runs a mini-parser over its markup; caching by
+    (text, style) builds each recurring paragraph once per generator and
+    reuses it across batch runs.
+    """
+    return Paragraph(text, style)
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional: without it calculate_totals falls back to plain NumPy.
+    _totals_kernel = None
+else:
+    @njit(cache=True)
+    def _totals_kernel(quantities, prices, rates, rate_indices, n_rates):
+        """JIT-compiled totals kernel shared by batch invoice runs.
+
+        cache=True persists the compiled code so the compile cost is paid
+        once, not on every process start.
+        """
+        subtotal = 0.0
+        total_tax = 0.0
+        bucketed = np.zeros(n_rates, dtype=np.float64)
+        for i in range(quantities.size):
+            line = quantities[i] * prices[i]
+            tax = line * rates[i]
+            subtotal += line
+            total_tax += tax
+            bucketed[rate_indices[i]] += tax
+        return subtotal, total_tax, bucketed
 
 class InvoiceGeneratorV2:
+    _COL_WIDTHS = [250, 50, 80, 70, 80]
+
+    # Above this many line items the platypus Table path is skipped in
+    # favour of direct canvas draws: Table's wrap/split layout work grows
+    # super-linearly with row count, while the canvas path stays O(n).
+    CANVAS_ROW_THRESHOLD = 40
+
+    # Static table styling shared by every invoice; the two position-dependent
+    # commands (right-aligned totals, bold grand total) are appended per call.
+    _BASE_TABLE_STYLE = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#40466e')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f5f5f5')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('PADDING', (0, 0), (-1, -1), 6),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Left align description
+    ]
+
     def __init__(self, company_info):
         self.company_info = company_info
-        self.items = []
+        # Items are stored as parallel lists (structure-of-arrays) so the
+        # totals can be computed with vectorized NumPy operations.
+        self.descriptions = []
+        self.quantities = []
+        self.prices = []
+        self.tax_rates = []
+        # Pre-formatted table rows, built once per item in add_item so the
+        # render loop never re-runs f-string formatting.
+        self.display_rows = []
         self.styles = getSampleStyleSheet()
-        
+        # Register custom styles once; the stylesheet is shared across every
+        # invoice this generator produces and rejects duplicate names.
+        if 'InvoiceTitle' not in self.styles:
+            self.styles.add(ParagraphStyle(
+                name='InvoiceTitle',
+                parent=self.styles['Heading1'],
+                fontSize=18,
+                spaceAfter=20,
+                alignment=1  # Center
+            ))
+
     def add_item(self, description, quantity, price, tax_rate=0.18):
         """Add an item to the invoice."""
-        self.items.append({
-            'description': description,
-            'quantity': quantity,
-            'price': price,
-            'tax_rate': tax_rate,
-            'total': quantity * price * (1 + tax_rate)
-        })
+        self.descriptions.append(description)
+        self.quantities.append(quantity)
+        self.prices.append(price)
+        self.tax_rates.append(tax_rate)
+        line = quantity * price
+        self.display_rows.append([
+            description,
+            str(quantity),
+            TOTAL_FMT(price),
+            f"{int(tax_rate*100)}%",
+            TOTAL_FMT(line + line * tax_rate),
+        ])
         return self
-    
+
+    def add_items_from_iterable(self, rows):
+        """Bulk-add items from (description, quantity, price, tax_rate) rows.
+
+        The numeric fields may be strings (e.g. straight from csv.reader);
+        nothing is prompted or validated interactively.
+        """
+        for description, quantity, price, tax_rate in rows:
+            self.add_item(description, float(quantity), float(price),
+                          float(tax_rate))
+        return self
+
+    @classmethod
+    def from_csv(cls, company_info, path):
+        """Build a generator from a CSV of description,quantity,price,tax_rate.
+
+        The first row is treated as a header and skipped; tax_rate is a
+        fraction (0.18, not 18).
+        """
+        generator = cls(company_info)
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # skip header
+            generator.add_items_from_iterable(reader)
+        return generator
+
+    def reset_items(self):
+        """Clear all line items so this generator can build the next invoice.
+
+        Reusing one generator per (company, worker process) — reset_items()
+        then add items and generate_invoice() per customer — amortizes the
+        getSampleStyleSheet() cost that reconstructing would pay each time.
+        The lists are cleared in place rather than rebound.
+        """
+        self.descriptions.clear()
+        self.quantities.clear()
+        self.prices.clear()
+        self.tax_rates.clear()
+        self.display_rows.clear()
+        return self
+
     def calculate_totals(self):
         """Calculate invoice totals."""
-        subtotal = sum(item['quantity'] * item['price'] for item in self.items)
-        tax_details = {}
-        
-        for item in self.items:
-            rate = item['tax_rate']
-            if rate not in tax_details:
-                tax_details[rate] = 0
-            tax_details[rate] += item['quantity'] * item['price'] * rate
-            
-        total_tax = sum(tax_details.values())
+        quantities = np.ascontiguousarray(self.quantities, dtype=np.float64)
+        prices = np.ascontiguousarray(self.prices, dtype=np.float64)
+        rates = np.ascontiguousarray(self.tax_rates, dtype=np.float64)
+
+        unique_rates = np.unique(rates)
+        rate_indices = np.searchsorted(unique_rates, rates)
+
+        if _totals_kernel is not None:
+            subtotal, total_tax, bucketed = _totals_kernel(
+                quantities, prices, rates, rate_indices, unique_rates.size)
+        else:
+            line_totals = quantities * prices
+            line_taxes = line_totals * rates
+            subtotal = float(line_totals.sum())
+            total_tax = float(line_taxes.sum())
+            bucketed = np.bincount(rate_indices, weights=line_taxes,
+                                   minlength=unique_rates.size)
+
         grand_total = subtotal + total_tax
-        
+        tax_details = dict(zip(unique_rates.tolist(),
+                               np.asarray(bucketed).tolist()))
+
         return {
             'subtotal': subtotal,
             'tax_details': tax_details,
@@ -45,96 +187,214 @@ class InvoiceGeneratorV2:
             'grand_total': grand_total
         }
     
-    def generate_invoice(self, customer_info, invoice_number, output_dir='.'):
-        """Generate the invoice PDF."""
+    def _header_flowables(self, customer_info, invoice_number, date_str):
+        """Company, invoice, and customer blocks shared by both render paths."""
+        styles = self.styles
+        normal = styles['Normal']
+        return [
+            # Company info (constant per generator, cached across invoices)
+            _static_paragraph(self.company_info['name'], styles['InvoiceTitle']),
+            _static_paragraph(self.company_info['address'], normal),
+            _static_paragraph(f"Phone: {self.company_info['phone']}", normal),
+            _static_paragraph(f"Email: {self.company_info['email']}", normal),
+            Spacer(1, 30),
+            # Invoice info
+            _static_paragraph("INVOICE", styles['Heading1']),
+            Paragraph(f"<b>Invoice #:</b> {invoice_number}", normal),
+            Paragraph(f"<b>Date:</b> {date_str}", normal),
+            Spacer(1, 20),
+            # Customer info
+            _static_paragraph("<b>Bill To:</b>", styles['Heading3']),
+            Paragraph(customer_info['name'], normal),
+            Paragraph(customer_info['address'], normal),
+            Spacer(1, 30),
+        ]
+
+    def generate_invoice(self, customer_info, invoice_number, output_dir='.',
+                         output=None, date_str=None):
+        """Generate the invoice PDF.
+
+        By default writes invoice_<number>.pdf under output_dir and returns
+        the filename. Pass a writable binary stream as output= (e.g. an
+        io.BytesIO destined for a web response) to skip the disk round-trip;
+        the stream itself is returned. Batch callers can pass date_str
+        (ISO format) to compute today's date once for the whole run.
+        """
         # Calculate totals
         totals = self.calculate_totals()
-        
-        # Create PDF
-        filename = os.path.join(output_dir, f'invoice_{invoice_number}.pdf')
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        
-        # Create custom styles
+
+        if output is None:
+            output = os.path.join(output_dir, f'invoice_{invoice_number}.pdf')
+        if date_str is None:
+            date_str = date.today().isoformat()
+
+        # Long invoices bypass Table layout entirely
+        if len(self.descriptions) > self.CANVAS_ROW_THRESHOLD:
+            return self._generate_invoice_canvas(customer_info, invoice_number,
+                                                 output, totals, date_str)
+
+        doc = SimpleDocTemplate(output, pagesize=letter)
         styles = self.styles
-        styles.add(ParagraphStyle(
-            name='InvoiceTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=20,
-            alignment=1  # Center
-        ))
-        
+
         # Build story
-        story = []
-        
-        # Add company info
-        story.append(Paragraph(self.company_info['name'], styles['InvoiceTitle']))
-        story.append(Paragraph(self.company_info['address'], styles['Normal']))
-        story.append(Paragraph(f"Phone: {self.company_info['phone']}", styles['Normal']))
-        story.append(Paragraph(f"Email: {self.company_info['email']}", styles['Normal']))
-        story.append(Spacer(1, 30))
-        
-        # Add invoice info
-        story.append(Paragraph("INVOICE", styles['Heading1']))
-        story.append(Paragraph(f"<b>Invoice #:</b> {invoice_number}", styles['Normal']))
-        story.append(Paragraph(f"<b>Date:</b> {datetime.now().strftime('%Y-%m-%d')}", styles['Normal']))
-        story.append(Spacer(1, 20))
-        
-        # Add customer info
-        story.append(Paragraph("<b>Bill To:</b>", styles['Heading3']))
-        story.append(Paragraph(customer_info['name'], styles['Normal']))
-        story.append(Paragraph(customer_info['address'], styles['Normal']))
-        story.append(Spacer(1, 30))
-        
+        story = self._header_flowables(customer_info, invoice_number, date_str)
+
         # Create items table
         data = [["Description", "Qty", "Price", "Tax %", "Total"]]
-        for item in self.items:
-            data.append([
-                item['description'],
-                str(item['quantity']),
-                f"₹{item['price']:.2f}",
-                f"{int(item['tax_rate']*100)}%",
-                f"₹{item['total']:.2f}"
-            ])
-        
+        data.extend(self.display_rows)
+
         # Add totals row
-        data.append(["", "", "", "Subtotal:", f"₹{totals['subtotal']:.2f}"])
-        
+        data.append(["", "", "", "Subtotal:", TOTAL_FMT(totals['subtotal'])])
+
         # Add tax rows
         for rate, tax in totals['tax_details'].items():
-            data.append(["", "", "", f"Tax ({int(rate*100)}%):", f"₹{tax:.2f}"])
-            
+            data.append(["", "", "", f"Tax ({int(rate*100)}%):", TOTAL_FMT(tax)])
+
         # Add grand total
-        data.append(["", "", "", "<b>Total:</b>", f"<b>₹{totals['grand_total']:.2f}</b>"])
+        data.append(["", "", "", "<b>Total:</b>", f"<b>{TOTAL_FMT(totals['grand_total'])}</b>"])
         
         # Create and style table
-        table = Table(data, colWidths=[250, 50, 80, 70, 80])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#40466e')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f5f5f5')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('PADDING', (0, 0), (-1, -1), 6),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Left align description
-            ('ALIGN', (-2, -len(totals['tax_details'])-2), (-1, -1), 'RIGHT'),  # Right align totals
-            ('FONTNAME', (-2, -1), (-1, -1), 'Helvetica-Bold'),  # Bold grand total
+        # Absolute row indices for the totals block: header row, then the
+        # items, then subtotal / per-rate tax rows / grand total. Concrete
+        # coordinates spare ReportLab from resolving negative indices
+        # against the row count for every styled cell.
+        totals_start = 1 + len(self.display_rows)
+        last_row = len(data) - 1
+
+        table = Table(data, colWidths=self._COL_WIDTHS)
+        table.setStyle(TableStyle(self._BASE_TABLE_STYLE + [
+            ('ALIGN', (3, totals_start), (4, last_row), 'RIGHT'),  # Right align totals
+            ('FONTNAME', (3, last_row), (4, last_row), 'Helvetica-Bold'),  # Bold grand total
         ]))
         
         story.append(table)
         story.append(Spacer(1, 40))
         
         # Add thank you note
-        story.append(Paragraph("Thank you for your business!", styles['Italic']))
+        story.append(_static_paragraph("Thank you for your business!",
+                                       styles['Italic']))
         
         # Build PDF
         doc.build(story)
-        return filename
+        return output
+
+    def _generate_invoice_canvas(self, customer_info, invoice_number,
+                                 output, totals, date_str):
+        """Render a large invoice with direct canvas draws.
+
+        Computes row coordinates itself and emits O(n) drawString calls,
+        repeating the header row at the top of each page, instead of
+        handing the whole item list to Table's layout engine.
+        """
+        page_width, page_height = letter
+        table_width = sum(self._COL_WIDTHS)
+        x0 = (page_width - table_width) / 2
+        col_edges = [x0]
+        for width in self._COL_WIDTHS:
+            col_edges.append(col_edges[-1] + width)
+        col_centers = [(a + b) / 2 for a, b in zip(col_edges, col_edges[1:])]
+
+        c = canvas.Canvas(output, pagesize=letter)
+
+        # Header/customer block reuses the Paragraph flowables from the
+        # platypus path, drawn manually instead of through a document.
+        y = page_height - 50
+        for flowable in self._header_flowables(customer_info, invoice_number,
+                                               date_str):
+            _, height = flowable.wrap(table_width, y)
+            flowable.drawOn(c, x0, y - height)
+            y -= height
+
+        row_height = 18
+        bottom_margin = 50
+        header_labels = ["Description", "Qty", "Price", "Tax %", "Total"]
+
+        def draw_header_row(y):
+            c.setFillColor(colors.HexColor('#40466e'))
+            c.rect(x0, y - row_height, table_width, row_height, stroke=0, fill=1)
+            c.setFillColor(colors.whitesmoke)
+            c.setFont('Helvetica-Bold', 10)
+            for label, center in zip(header_labels, col_centers):
+                c.drawCentredString(center, y - row_height + 5, label)
+            c.setFillColor(colors.black)
+            c.setFont('Helvetica', 9)
+            return y - row_height
+
+        def next_row(y):
+            if y - row_height < bottom_margin:
+                c.showPage()
+                return draw_header_row(page_height - 50)
+            return y
+
+        y = draw_header_row(y)
+        for desc, qty_str, price_str, tax_str, total_str in self.display_rows:
+            y = next_row(y)
+            c.setFillColor(colors.HexColor('#f5f5f5'))
+            c.rect(x0, y - row_height, table_width, row_height, stroke=0, fill=1)
+            c.setFillColor(colors.black)
+            text_y = y - row_height + 5
+            c.drawString(col_edges[0] + 6, text_y, desc)
+            c.drawCentredString(col_centers[1], text_y, qty_str)
+            c.drawCentredString(col_centers[2], text_y, price_str)
+            c.drawCentredString(col_centers[3], text_y, tax_str)
+            c.drawCentredString(col_centers[4], text_y, total_str)
+            y -= row_height
+
+        # Totals block, right-aligned like the platypus path
+        totals_rows = [("Subtotal:", totals['subtotal'])]
+        for rate, tax in totals['tax_details'].items():
+            totals_rows.append((f"Tax ({int(rate*100)}%):", tax))
+        for label, amount in totals_rows:
+            y = next_row(y)
+            text_y = y - row_height + 5
+            c.drawRightString(col_edges[4] - 6, text_y, label)
+            c.drawRightString(col_edges[5] - 6, text_y, TOTAL_FMT(amount))
+            y -= row_height
+
+        y = next_row(y)
+        c.setFont('Helvetica-Bold', 9)
+        text_y = y - row_height + 5
+        c.drawRightString(col_edges[4] - 6, text_y, "Total:")
+        c.drawRightString(col_edges[5] - 6, text_y, TOTAL_FMT(totals['grand_total']))
+        y -= row_height
+
+        # Thank you note
+        c.setFont('Helvetica-Oblique', 10)
+        c.drawString(x0, max(y - 40, bottom_margin), "Thank you for your business!")
+
+        c.save()
+        return output
+
+    @classmethod
+    def generate_many(cls, jobs, output_dir='.'):
+        """Generate invoices in parallel, one process per invoice.
+
+        doc.build is CPU-bound Python that never releases the GIL, so
+        processes (not threads) are what scales on batch runs.
+
+        jobs is an iterable of (company_info, customer_info, items,
+        invoice_number) tuples, where items is a sequence of
+        (description, quantity, price, tax_rate) tuples. Returns the
+        generated filenames in job order.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return []
+        companies, customers, item_lists, numbers = zip(*jobs)
+        with ProcessPoolExecutor() as executor:
+            return list(executor.map(_build_one, companies, customers,
+                                     item_lists, numbers, repeat(output_dir)))
+
+def _build_one(company_info, customer_info, items, invoice_number, output_dir):
+    """Build a single invoice; module-level so it is picklable for workers.
+
+    Each worker constructs its own generator, keeping ReportLab's
+    style/font state process-local.
+    """
+    generator = InvoiceGeneratorV2(company_info)
+    for description, quantity, price, tax_rate in items:
+        generator.add_item(description, quantity, price, tax_rate)
+    return generator.generate_invoice(customer_info, invoice_number, output_dir)
 
 def get_company_info():
     """Get company information from user input."""
@@ -154,48 +414,74 @@ def get_customer_info():
         'address': input("Address: ")
     }
 
+_NUM_RE = re.compile(r'^\d+(\.\d+)?$')
+
+def _read_float(prompt, default=None):
+    """Read a non-negative number from input, or None if it isn't one.
+
+    The regex pre-check rejects bad input by return value, so the happy
+    path never pays for a ValueError being raised and unwound as control
+    flow.
+    """
+    text = input(prompt).strip()
+    if not text and default is not None:
+        text = default
+    if not _NUM_RE.match(text):
+        return None
+    return float(text)
+
 def add_items_to_invoice(invoice):
     """Add items to the invoice interactively."""
+    if not sys.stdin.isatty():
+        # Piped input: read CSV rows (description,quantity,price,tax_rate)
+        # in bulk instead of prompting field by field. A 'done' line ends
+        # the item section so later prompts can still read from the pipe.
+        rows = []
+        for row in csv.reader(sys.stdin):
+            if row and row[0].strip().lower() == 'done':
+                break
+            if row:
+                rows.append(row)
+        invoice.add_items_from_iterable(rows)
+        return
+
     print("\n=== Add Items (enter 'done' when finished) ===")
     
     while True:
         description = input("\nItem description (or 'done'): ").strip()
         if description.lower() == 'done':
-            if not invoice.items:
+            if not invoice.descriptions:
                 print("Please add at least one item.")
                 continue
             break
             
         while True:
-            try:
-                quantity = float(input("Quantity: "))
-                if quantity <= 0:
-                    print("Quantity must be greater than 0")
-                    continue
-                break
-            except ValueError:
+            quantity = _read_float("Quantity: ")
+            if quantity is None:
                 print("Please enter a valid number")
-                
-        while True:
-            try:
-                price = float(input("Price per unit (₹): "))
-                if price < 0:
-                    print("Price cannot be negative")
-                    continue
+            elif quantity <= 0:
+                print("Quantity must be greater than 0")
+            else:
                 break
-            except ValueError:
-                print("Please enter a valid number")
-                
+
         while True:
-            try:
-                tax_rate = input("Tax rate (% - press Enter for 18%): ") or "18"
-                tax_rate = float(tax_rate) / 100
-                if tax_rate < 0 or tax_rate > 1:
-                    print("Tax rate must be between 0% and 100%")
-                    continue
+            price = _read_float("Price per unit (₹): ")
+            if price is None:
+                print("Please enter a valid number")
+            else:
                 break
-            except ValueError:
+
+        while True:
+            tax_rate = _read_float("Tax rate (% - press Enter for 18%): ",
+                                   default="18")
+            if tax_rate is None:
                 print("Please enter a valid number")
+                continue
+            tax_rate /= 100
+            if tax_rate > 1:
+                print("Tax rate must be between 0% and 100%")
+                continue
+            break
         
         invoice.add_item(description, quantity, price, tax_rate)
         print(f"✓ Added: {quantity} x {description} @ ₹{price:.2f} ({int(tax_rate*100)}% tax)")
@@ -220,12 +506,14 @@ if __name__ == "__main__":
     customer = get_customer_info()
     
     # Generate invoice number (YYYYMMDD-XXX format)
-    invoice_number = f"INV-{datetime.now().strftime('%Y%m%d')}-001"
+    date_str = date.today().isoformat()
+    invoice_number = f"INV-{date_str.replace('-', '')}-001"
     
     # Generate the invoice
     print("\nGenerating invoice...")
     try:
-        filename = invoice.generate_invoice(customer, invoice_number, output_dir)
+        filename = invoice.generate_invoice(customer, invoice_number, output_dir,
+                                            date_str=date_str)
         print(f"\n✅ Invoice generated successfully: {os.path.abspath(filename)}")
     except Exception as e:
         print(f"\n❌ Error generating invoice: {str(e)}")